@@ -8,7 +8,11 @@ It handles the initialization of agents, their execution, and the management of
 from dotenv import load_dotenv
 load_dotenv()
 
+import threading
+from functools import lru_cache
+from typing import List, Literal, Optional
 
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.chat_models import init_chat_model
 from langchain_tavily import TavilySearch
@@ -17,6 +21,49 @@ from langgraph.prebuilt import create_react_agent
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from templates import SYSTEM_PROMPT_JSON
 
+# Maximum number of diagnostics allowed to hit the LLM/search APIs at the same time
+MAX_CONCURRENT_DIAGNOSTICS = 4
+# Seconds a run waits for a free slot before giving up with DiagnosticsBusyError
+DIAGNOSTICS_SLOT_TIMEOUT = 30
+_diagnostics_slots = threading.BoundedSemaphore(MAX_CONCURRENT_DIAGNOSTICS)
+
+
+class DiagnosticsBusyError(RuntimeError):
+   """Raised when every diagnostics slot stays busy for longer than DIAGNOSTICS_SLOT_TIMEOUT."""
+
+
+class DiagnosticsInput(BaseModel):
+   """
+   Inputs for a diagnostics run.
+
+   mode="challenges" is driven by the challenges identified on the country dashboard,
+   mode="reforms" is driven by the reforms the country already plans to implement.
+   """
+   model_config = ConfigDict(extra="forbid")
+
+   mode: Literal["challenges", "reforms"]
+   country: str
+   language: Optional[str] = None
+   strategy: Optional[str] = None
+   challenges: List[str] = Field(default_factory=list)
+   planned_reforms: List[str] = Field(default_factory=list)
+   expected_outcome: Optional[str] = None
+   add_context: Optional[str] = None
+
+   @model_validator(mode="after")
+   def check_mode_fields(self):
+       """Reject fields that belong to the other mode, since the prompt would silently drop them."""
+       if self.mode == "challenges":
+           other_fields = ["planned_reforms", "expected_outcome"]
+       else:
+           other_fields = ["challenges"]
+       fields = self.model_dump()
+       invalid = [key for key in other_fields if is_valid_input(key, fields)]
+       if invalid:
+           raise ValueError(f"{', '.join(invalid)} cannot be used with mode='{self.mode}'")
+       return self
+
+
 def is_valid_input(key, inputs):
    """
    Check if the input for a given key is valid (not None, empty, or an empty list).
@@ -31,19 +78,15 @@ def is_valid_input(key, inputs):
    """
    return inputs.get(key) is not None and inputs[key] != "" and inputs[key] != []
 
-def run_diagnostics(inputs):
+@lru_cache(maxsize=1)
+def get_agent():
    """
-   Run diagnostics for a given country with optional approach and priority.
-
-
-   Args:
-       inputs (dict): A dictionary containing the inputs for diagnostics {'country', 'approach', 'focus', 'pol_reform', 'add_context'}.
+   Build the diagnostics agent once and reuse the compiled graph for every run.
 
 
    Returns:
-       results (dict): The diagnostics result.
+       agent_executor (CompiledGraph): The compiled ReAct agent.
    """
-   # Create an agent
    model = init_chat_model("gemini-2.5-flash", model_provider="google-genai")
    search = TavilySearch(
        max_results=5,
@@ -58,28 +101,63 @@ def run_diagnostics(inputs):
            MessagesPlaceholder(variable_name="messages"),
        ]
    )
-   agent_executor = create_react_agent(
+   return create_react_agent(
        model,
        tools,
        prompt=system_prompt
    )
 
+def build_user_prompt(inputs):
+   """
+   Build the user prompt for a diagnostics run.
+
+
+   Args:
+       inputs (DiagnosticsInput): The diagnostics inputs.
+
+
+   Returns:
+       user_prompt (str): The prompt sent to the agent.
+   """
+   fields = inputs.model_dump()
+   user_prompt = f"Run a diagnostic for the country of {inputs.country}"
+
+   if is_valid_input("language", fields):
+       user_prompt += f" in {inputs.language} language"
+   if inputs.mode == "challenges" and is_valid_input("challenges", fields):
+       user_prompt += f" addressing the challenges identified from the dashboard: {', '.join(inputs.challenges)}"
+   if inputs.mode == "reforms":
+       if is_valid_input("planned_reforms", fields):
+           user_prompt += f" with planned reforms: {', '.join(inputs.planned_reforms)}"
+       if is_valid_input("expected_outcome", fields):
+           user_prompt += f" with expected outcome: {inputs.expected_outcome}"
+   if is_valid_input("add_context", fields):
+       user_prompt += f" with additional context: {inputs.add_context}"
+   if is_valid_input("strategy", fields):
+       user_prompt += f" using the strategic approach: {inputs.strategy}"
+
+   return user_prompt
+
+def run_diagnostics(inputs):
+   """
+   Run diagnostics for a given country, driven either by dashboard challenges or by planned reforms.
+
 
-   user_prompt = f"Run a diagnostic for the country of {inputs['country']}"
+   Args:
+       inputs (DiagnosticsInput | dict): The diagnostics inputs {'mode', 'country', 'language', 'strategy', 'challenges', 'planned_reforms', 'expected_outcome', 'add_context'}.
 
 
-   if is_valid_input("approach", inputs):
-       user_prompt += f" with the strategic approach {inputs['approach']}"
-   if is_valid_input("focus", inputs):
-       user_prompt += f" focusing on the priority area of {inputs['focus']}"
-   if is_valid_input("pol_reform", inputs):
-       # Ensure 'pol_reform' is a string, even if it's a list
-       if isinstance(inputs['pol_reform'], list):
-           user_prompt += f" with planned policy reforms: {', '.join(inputs['pol_reform'])}"
+   Returns:
+       results (dict): The diagnostics result.
 
+   Raises:
+       DiagnosticsBusyError: If no diagnostics slot frees up within DIAGNOSTICS_SLOT_TIMEOUT seconds.
+   """
+   if not isinstance(inputs, DiagnosticsInput):
+       inputs = DiagnosticsInput.model_validate(inputs)
 
-   if is_valid_input("add_context", inputs):
-       user_prompt += f" with additional context: {inputs['add_context']}"
+   agent_executor = get_agent()
+   user_prompt = build_user_prompt(inputs)
 
 
    # Use the agent
@@ -90,10 +168,17 @@ def run_diagnostics(inputs):
        "role": "user",
        "content": user_prompt,
    }
-  
-   results = agent_executor.invoke(
-       {"messages": [input_message]}, config
-   )
+
+   if not _diagnostics_slots.acquire(timeout=DIAGNOSTICS_SLOT_TIMEOUT):
+       raise DiagnosticsBusyError(
+           "All diagnostics slots are busy, please try again in a moment."
+       )
+   try:
+       results = agent_executor.invoke(
+           {"messages": [input_message]}, config
+       )
+   finally:
+       _diagnostics_slots.release()
 
 
    # Uncomment the following lines if you want to stream the results
@@ -112,87 +197,43 @@ def run_diagnostics_with_planned_reforms(inputs):
 
 
     Args:
-        inputs (dict): A dictionary containing the inputs for diagnostics {'country', 'planned_reforms', 'expected_outcome', 'add_context', 'strategy', 'language'}.
+        inputs (DiagnosticsInput | dict): The diagnostics inputs {'country', 'planned_reforms', 'expected_outcome', 'add_context', 'strategy', 'language'}.
 
 
     Returns:
         results (dict): The diagnostics result.
     """
-    # Create an agent
-    model = init_chat_model("gemini-2.5-flash", model_provider="google-genai")
-    search = TavilySearch(
-        max_results=5,
-        include_answer=True
-    )
-    tools = [search]
-
-
-    system_prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT_JSON),
-            MessagesPlaceholder(variable_name="messages"),
-        ]
-    )
-    agent_executor = create_react_agent(
-        model,
-        tools,
-        prompt=system_prompt
-    )
-
-
-    user_prompt = f"Run a diagnostic for the country of {inputs['country']}"
-
-    if is_valid_input("language", inputs):
-        user_prompt += f" in {inputs['language']} language"
-    if is_valid_input("planned_reforms", inputs):
-        user_prompt += f" with planned reforms: {', '.join(inputs['planned_reforms'])}"
-    if is_valid_input("expected_outcome", inputs):
-        user_prompt += f" with expected outcome: {inputs['expected_outcome']}"
-    if is_valid_input("add_context", inputs):
-        user_prompt += f" with additional context: {inputs['add_context']}"
-    if is_valid_input("strategy", inputs):
-        user_prompt += f" using the strategic approach: {inputs['strategy']}"
-
-
-    # Use the agent
-    config = {"configurable": {"thread_id": "abc123"}}  # will be useful for session memory and async execution
-
-
-    input_message = {
-        "role": "user",
-        "content": user_prompt,
-    }
-  
-    results = agent_executor.invoke(
-        {"messages": [input_message]}, config
-    )
-
-
-    return results
+    if isinstance(inputs, DiagnosticsInput):
+        inputs = inputs.model_copy(update={"mode": "reforms"})
+        # model_copy skips validation, so re-check the mode fields
+        inputs = DiagnosticsInput.model_validate(inputs.model_dump())
+    else:
+        inputs = DiagnosticsInput(**{**inputs, "mode": "reforms"})
+    return run_diagnostics(inputs)
 
 
 if __name__ == "__main__":
     # Example usage
-    # inputs = {
-    #     "country": "Indonesia",
-    #     "approach": "Address Most Urgent Priorities",
-    #     "priority": "Learning Performance",
-    #     "pol_reform": "Curriculum Reform",
-    #     "add_context": None
-    # }
+    # inputs = DiagnosticsInput(
+    #     mode="challenges",
+    #     country="Indonesia",
+    #     challenges=["Low foundational learning outcomes (18.3% proficiency)"],
+    #     strategy="Address Most Urgent Priorities",
+    #     language="English"
+    # )
 
 
     # results = run_diagnostics(inputs)
     # print(results)  # Print the diagnostics result
 
-    inputs = {
-        "country": "Indonesia",
-        "planned_reforms": ["Curriculum Reform", "Teacher Reform"],
-        "expected_outcome": "Improved student literacy rates",
-        "add_context": None,
-        "strategy": "Amplify Existing Strengths",
-        "language": "English"
-    }
+    inputs = DiagnosticsInput(
+        mode="reforms",
+        country="Indonesia",
+        planned_reforms=["Curriculum Reform", "Teacher Reform"],
+        expected_outcome="Improved student literacy rates",
+        strategy="Amplify Existing Strengths",
+        language="English"
+    )
 
-    results = run_diagnostics_with_planned_reforms(inputs)
+    results = run_diagnostics(inputs)
     print(results)  # Print the diagnostics result
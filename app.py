@@ -1,6 +1,6 @@
 import streamlit as st
 
-from agents.orchestrator import run_diagnostics_with_planned_reforms
+from agents.orchestrator import DiagnosticsBusyError, DiagnosticsInput, run_diagnostics
 from tools import utils
 
 # initialize session state
@@ -14,6 +14,96 @@ def reset():
             del st.session_state[key]
     st.session_state.step = 1
 
+def show_recommendations(inputs):
+    """
+    Run the diagnostics pipeline and render the strategic diagnostic and recommendations.
+
+    Args:
+        inputs (DiagnosticsInput): The diagnostics inputs collected from either tab.
+    """
+    print(f"Inputs for diagnostics: {inputs}")
+
+    try:
+        results = run_diagnostics(inputs)
+    except DiagnosticsBusyError as e:
+        st.error(str(e))
+        return
+    # Parse the results
+    outputs = utils.parse_json_string(results['messages'][-1].content)
+
+    print(f"JSON outputs {outputs.keys()}: {outputs}")
+
+    ### Diagnostic Summary
+    st.subheader("Strategic Diagnostic")
+    st.markdown(f"**Country: {inputs.country}**")
+    st.markdown(f"**Approach: {inputs.strategy}**")
+    st.write(outputs['strategic_diagnostic'])
+    st.markdown("---")
+    
+    ### Detailed Recommendations
+    st.subheader("Strategic Recommendations")
+    for i, srec in enumerate(outputs['strategic_recommendations']):
+        # recommendation = srec['recommendation']
+        
+        # Title and Priority
+        st.markdown(f"### {i+1}. {srec['title']}")
+        st.markdown(f"**Priority**: {srec['priority']}")
+        st.write(f"{srec['description']}")
+
+        st.markdown(f"**Strategic Rationale**: {srec['strategic_rationale']}")
+        # st.markdown(f"**Implementation Approach**: {srec['implementation_approach']}")
+        st.markdown(f"**Implementation Approach**: ")
+        for approach in srec['implementation_approach']:
+            st.markdown(f"- {approach}")
+        st.markdown(f"**Timeline**: {srec['timeline']}")
+        
+        # Best Practices
+        st.markdown("**Best Practices from Similar Contexts**")
+        for bp in srec.get('best_practices', []):
+            st.markdown(
+                f"- **{bp['title']}** ({bp['location']}): {bp['outcome']}  \n"
+                f" Source: {bp['reference']}"
+                # f"[View Report]({bp['reference']})"
+            )
+        
+        # Lessons Learned
+        st.markdown("**Lessons Learned from Failure Cases**")
+        for ll in srec.get('lesson_learned', []):
+            st.markdown(
+                f"- **{ll['title']}** ({ll['location']}): {ll['outcome']}  \n"
+                f" Source: {ll.get('reference')}"
+                # f"[View Report]({ll['reference']})"
+            )
+
+        # st.write(f"**Key Takeaways**: {srec['key_takeaways']}")
+        st.write(f"**Key Takeaways**: ")
+        for takeaway in srec['key_takeaways']:
+            st.markdown(f"- {takeaway}")
+
+        st.write(f"**Key Action Items**: ")
+        for action in srec['key_action_items']:
+            st.markdown(f"- {action}")
+        # # Key Performance Indicators and Cross-Sectoral Linkages
+        # st.write(f"**Key performance indicator**: {srec['key_performance_indicators']}")
+        # st.write(f"**Cross sectoral linkages**: {srec['cross_sectoral_linkages']}")
+        
+        # Supporting References
+        st.markdown("**Supporting Academic Research**")
+        for ref in srec["supporting_references"]:
+            st.markdown(f"- {ref}")
+        
+        st.markdown("---")
+
+
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("Rerun Analysis"):
+            st.experimental_rerun()
+    with col2:
+        if st.button("Create Implementation Roadmap"):
+            st.info("Launching roadmap builder…") 
+
 st.title("Strategic Education Diagnostics")
 st.write("Get AI-powered insights and strategic recommendations tailored to your approach.")
 st.write("You can generate recommendations based on emerging issues from your dashboard, or based on a reform you already plan to implement.")
@@ -100,16 +190,29 @@ else:
         )
 
         if st.button("Generate Recommendations from Insights", type="primary"):
-            st.success(f"""Generating recommendations for **{st.session_state.country}**  
-            - Challenges: {', '.join(challenges)}  
-            - Additional: {additional or '–'}  
-            - Approach: {strategy}""")
-            # Placeholder for backend call
-            # from agents.orchestrator import run_diagnostics
-            # outputs = run_diagnostics(country=st.session_state.country, priority=challenges, additional_context=additional, approach=strategy)
-            # ... display outputs ...
-            if st.button("Start Over", key="reset_dashboard"):
-                reset()
+            all_challenges = challenges + ([additional] if additional else [])
+            if not all_challenges:
+                st.warning("Please select or add at least one challenge.")
+            else:
+                st.info("Running AI diagnostics…")
+
+                # Prepare input payload
+                inputs = DiagnosticsInput(
+                    mode="challenges",
+                    country=st.session_state.country,
+                    challenges=all_challenges,
+                    strategy=strategy,
+                    language=language
+                )
+
+                st.success(f"""Generating recommendations for **{st.session_state.country}**  
+                - Challenges: {', '.join(challenges)}  
+                - Additional: {additional or '–'}  
+                - Approach: {strategy}""")
+
+                show_recommendations(inputs)
+                if st.button("Start Over", key="reset_dashboard"):
+                    reset()
 
     # --- Tab 2: Planned Reforms ---
     with tab2:
@@ -144,22 +247,15 @@ else:
             st.info("Running AI diagnostics…")
 
             # Prepare input payload
-            inputs = {
-                "country": st.session_state.country,
-                "planned_reforms": planned,
-                "expected_outcome": outcome,
-                "add_context": context,
-                "strategy": strategy,
-                "language": language
-            }
-
-            print(f"Inputs for diagnostics: {inputs}")
-
-            results = run_diagnostics_with_planned_reforms(inputs)
-            # Parse the results
-            outputs = utils.parse_json_string(results['messages'][-1].content)
-
-            print(f"JSON outputs {outputs.keys()}: {outputs}")
+            inputs = DiagnosticsInput(
+                mode="reforms",
+                country=st.session_state.country,
+                planned_reforms=planned,
+                expected_outcome=outcome,
+                add_context=context,
+                strategy=strategy,
+                language=language
+            )
 
             st.success(f"""Generating recommendations for **{st.session_state.country}**  
             - Reforms: {', '.join(planned)}  
@@ -167,73 +263,4 @@ else:
             - Context: {context or '–'}  
             - Approach: {strategy}""")
 
-            ### Diagnostic Summary
-            st.subheader("Strategic Diagnostic")
-            st.markdown(f"**Country: {inputs['country']}**")
-            st.markdown(f"**Approach: {inputs['strategy']}**")
-            st.write(outputs['strategic_diagnostic'])
-            st.markdown("---")
-            
-            ### Detailed Recommendations
-            st.subheader("Strategic Recommendations")
-            for i, srec in enumerate(outputs['strategic_recommendations']):
-                # recommendation = srec['recommendation']
-                
-                # Title and Priority
-                st.markdown(f"### {i+1}. {srec['title']}")
-                st.markdown(f"**Priority**: {srec['priority']}")
-                st.write(f"{srec['description']}")
-
-                st.markdown(f"**Strategic Rationale**: {srec['strategic_rationale']}")
-                # st.markdown(f"**Implementation Approach**: {srec['implementation_approach']}")
-                st.markdown(f"**Implementation Approach**: ")
-                for approach in srec['implementation_approach']:
-                    st.markdown(f"- {approach}")
-                st.markdown(f"**Timeline**: {srec['timeline']}")
-                
-                # Best Practices
-                st.markdown("**Best Practices from Similar Contexts**")
-                for bp in srec.get('best_practices', []):
-                    st.markdown(
-                        f"- **{bp['title']}** ({bp['location']}): {bp['outcome']}  \n"
-                        f" Source: {bp['reference']}"
-                        # f"[View Report]({bp['reference']})"
-                    )
-                
-                # Lessons Learned
-                st.markdown("**Lessons Learned from Failure Cases**")
-                for ll in srec.get('lesson_learned', []):
-                    st.markdown(
-                        f"- **{ll['title']}** ({ll['location']}): {ll['outcome']}  \n"
-                        f" Source: {bp['reference']}"
-                        # f"[View Report]({ll['reference']})"
-                    )
-
-                # st.write(f"**Key Takeaways**: {srec['key_takeaways']}")
-                st.write(f"**Key Takeaways**: ")
-                for takeaway in srec['key_takeaways']:
-                    st.markdown(f"- {takeaway}")
-
-                st.write(f"**Key Action Items**: ")
-                for action in srec['key_action_items']:
-                    st.markdown(f"- {action}")
-                # # Key Performance Indicators and Cross-Sectoral Linkages
-                # st.write(f"**Key performance indicator**: {srec['key_performance_indicators']}")
-                # st.write(f"**Cross sectoral linkages**: {srec['cross_sectoral_linkages']}")
-                
-                # Supporting References
-                st.markdown("**Supporting Academic Research**")
-                for ref in srec["supporting_references"]:
-                    st.markdown(f"- {ref}")
-                
-                st.markdown("---")
-
-
-            col1, col2 = st.columns(2)
-    
-            with col1:
-                if st.button("Rerun Analysis"):
-                    st.experimental_rerun()
-            with col2:
-                if st.button("Create Implementation Roadmap"):
-                    st.info("Launching roadmap builder…") 
\ No newline at end of file
+            show_recommendations(inputs)